@@ -1,88 +1,53 @@
+import asyncio
+import functools
+import hashlib
 import logging
 import traceback
 import os
-from typing import Tuple, Optional, List
+from typing import AsyncIterator, Dict, Tuple, Optional, List
 
-from agents import Agent, Runner
-from models import Quiz, Question
+import httpx
+import orjson
+import tiktoken
+from agents import Agent, ModelSettings, Runner, set_default_openai_client
+from openai import AsyncOpenAI, RateLimitError
+from pydantic import BaseModel
+from models import Quiz, QuizWithSummary, Question
+from semantic_cache import SemanticResponseCache
 from utils import save_text_to_file
 
-# estimate character limit for token limits:
-# OpenAI's gpt-4.1 TPM is 30,000. A chunk of 15,000 chars is a good threshold.
-MAX_CHUNK_SIZE = 15000
+# token budget per chunk, measured with tiktoken so it holds across languages
+# (characters-per-token varies 2-5x in Italian medical text)
+MAX_CHUNK_TOKENS = 6000
 
-class QuizGenerator:
-    """Class for generating quizzes using AI agents"""
-    
-    def __init__(self, model: str, summary_dir: str):
-        """Initialize the quiz generator
-        
-        Args:
-            model (str): The OpenAI model to use
-            summary_dir (str): Directory to save summaries
-        """
-        self.model = model
-        self.summary_dir = summary_dir
-        os.makedirs(self.summary_dir, exist_ok=True)
+# tokens repeated between consecutive chunks to preserve context across the split
+CHUNK_OVERLAP_TOKENS = 200
 
-    def _split_text_into_chunks(self, text: str, chunk_size: int = MAX_CHUNK_SIZE) -> List[str]:
-        """Splits text into chunks of a specified size."""
-        chunks = []
-        for i in range(0, len(text), chunk_size):
-            chunks.append(text[i:i + chunk_size])
-        logging.info(f"Split text into {len(chunks)} chunks.")
-        return chunks
+# how far back (in tokens) to look for a paragraph break when rounding a split point
+PARAGRAPH_SCAN_TOKENS = 500
 
-    async def _summarize_chunk(self, chunk: str, chunk_num: int, total_chunks: int, language: str, base_summarizer_instructions: str) -> str:
-        """Summarizes a single chunk of text."""
-        logging.info(f"Summarizing chunk {chunk_num + 1}/{total_chunks}...")
-        contextual_prompt_addition = ""
-        if total_chunks > 1:
-            contextual_prompt_addition = f"\n\nNota: Questo è il frammento {chunk_num + 1} di {total_chunks} di un documento più grande. Concentrati sul riassumere questo specifico frammento nel contesto del suo potenziale collegamento con altri frammenti."
-        
-        current_instructions = base_summarizer_instructions + contextual_prompt_addition
-        
-        chunk_summarizer_agent = Agent(
-            name=f"text_summarizer_chunk_{chunk_num + 1}",
-            instructions=current_instructions,
-            model=self.model
-        )
+# concurrent Runner.run calls allowed at once (keeps us under OpenAI RPM/TPM limits)
+MAX_PARALLEL_REQUESTS = 8
 
-        try:
-            summary_result = await Runner.run(chunk_summarizer_agent, chunk)
-            logging.info(f"Successfully summarized chunk {chunk_num + 1}/{total_chunks}.")
-            return summary_result.final_output
-        except Exception as e:
-            logging.error(f"Error summarizing chunk {chunk_num + 1}/{total_chunks}: {str(e)}")
-            logging.error(traceback.format_exc())
-            return "" # empty string on error
+# documents processed concurrently by create_quizzes
+MAX_PARALLEL_DOCUMENTS = 8
 
-    async def create_quiz_from_text(self, text: str, filename: str, language: str, num_questions_total: int = 10) -> Tuple[Optional[Quiz], Optional[str]]:
-        """Process a single text document, generate questions per chunk, and aggregate them.
-        
-        Args:
-            text (str): The text to process
-            filename (str): The name of the file to process
-            language (str): The language to generate the quiz in
-            num_questions_total (int): Total number of questions desired for the quiz (default: 10)
+# exponential backoff delays (seconds) for rate-limited calls
+RETRY_DELAYS = [1, 2, 4]
 
-        Returns:
-            Tuple[Optional[Quiz], Optional[str]]: A tuple containing the final quiz and the base filename
-        """
-        try:
-            base_filename = filename.replace('.pdf', '').replace('.txt', '')
-            
-            text_chunks = self._split_text_into_chunks(text)
-            num_chunks = len(text_chunks)
+# seconds between status checks while waiting for a Batch API job
+BATCH_POLL_INTERVAL = 60
 
-            if num_chunks == 0:
-                logging.warning(f"No text chunks to process for {filename}.")
-                return None, base_filename
+# low temperature keeps outputs terse and schema-compliant across languages
+GENERATION_TEMPERATURE = 0.3
 
-            all_questions: List[Question] = []
-            aggregated_chunk_summaries_for_saving = []
+# output-token caps. A question costs far more than its text alone: theme,
+# four answer sentences, scores, and the JSON scaffolding add up to ~200 tokens
+SUMMARY_MAX_TOKENS = 1500
+TOKENS_PER_QUESTION = 200
 
-            base_summarizer_instructions = f"""
+# prompt templates, rendered per language by the lru_cached builders below
+_SUMMARIZER_TEMPLATE = """
             sei un esperto nella creazione di riassunti dettagliati di testi medici sulle malattie.
             crea un riassunto completo che catturi tutte le informazioni importanti sulla/e malattia/e descritta/e nel testo.
             concentrati sull'estrazione di informazioni mediche chiave come:
@@ -93,48 +58,15 @@ class QuizGenerator:
             - approcci terapeutici e gestione
             - strategie di prevenzione
             - epidemiologia e statistiche
-            
+
             tutti i riassunti devono essere in {language}.
             mantieni l'accuratezza medica rendendo il contenuto più conciso.
             organizza le informazioni in modo strutturato che evidenzi gli aspetti più importanti della/e malattia/e.
             """
 
-            for i, chunk in enumerate(text_chunks):
-                logging.info(f"Processing chunk {i + 1}/{num_chunks} for {filename}...")
-                # 1. summarize chunk
-                chunk_summary = await self._summarize_chunk(chunk, i, num_chunks, language, base_summarizer_instructions)
-                
-                if not chunk_summary:
-                    logging.warning(f"Chunk {i + 1}/{num_chunks} for {filename} could not be summarized. Skipping quiz generation for this chunk.")
-                    continue
-
-                aggregated_chunk_summaries_for_saving.append(chunk_summary)
-
-                # determine questions for this chunk if total not yet met
-                remaining_questions_needed = num_questions_total - len(all_questions)
-                if remaining_questions_needed <= 0 and num_questions_total > 0:
-                    logging.info(f"Target of {num_questions_total} questions reached. Stopping further question generation.")
-                    break 
-                
-                if num_questions_total == 0:
-                    logging.info("num_questions_total is 0, no questions will be generated.")
-                    break
-
-                remaining_chunks_to_process = num_chunks - i
-                questions_to_attempt_for_this_chunk = max(1, (remaining_questions_needed + remaining_chunks_to_process - 1) // remaining_chunks_to_process) if remaining_chunks_to_process > 0 else 0
-                
-                if questions_to_attempt_for_this_chunk <= 0:
-                    continue
-
-                logging.info(f"Attempting to generate {questions_to_attempt_for_this_chunk} questions for chunk {i + 1}/{num_chunks} of {filename}.")
-
-                # 2. generate quiz questions from this chunk's summary
-                quiz_generator_agent_for_chunk = Agent(
-                    name=f"quiz_generator_chunk_{i+1}",
-                    instructions=f"""
+_QUIZ_GENERATOR_TEMPLATE = """
                     Sei un esperto nella creazione di quiz educativi su malattie, destinati a persone che vivono con quella condizione.
-                    Il testo fornito è un riassunto del frammento {i + 1} di {num_chunks} di un documento più grande.
-                    Crea esattamente {questions_to_attempt_for_this_chunk} domande a scelta multipla basate ESCLUSIVAMENTE sul testo di QUESTO RIASSUNTO DEL FRAMMENTO.
+                    Crea esattamente il numero di domande a scelta multipla richiesto nell'input, basate ESCLUSIVAMENTE sul testo del riassunto fornito.
 
                     IMPORTANTE:
                     - Immagina di parlare con una persona comune che soffre di questa malattia.
@@ -152,7 +84,7 @@ class QuizGenerator:
                     - molto simile a quella corretta ma con qualcosa di sbagliato (2 punti)
                     - una sbagliata (0 punti)
                     - una molto sbagliata (-2 punti)
-                    
+
                     ## ESEMPIO DI DOMANDA:
                     Domanda: "Quale situazione è tipica dell'incontinenza urinaria da sforzo?"
                     Risposte:
@@ -165,31 +97,406 @@ class QuizGenerator:
                     Tutte le domande e risposte devono essere in {language}.
                     Non menzionare il testo di riferimento.
                     Assicurati che ogni domanda abbia esattamente 4 risposte.
-                    """,
-                    output_type=Quiz,
-                    model=self.model
+                    """
+
+# bridges the two templates when one agent produces the summary and the questions together
+_SUMMARY_TO_QUIZ_BRIDGE = """
+            Scrivi il riassunto nel campo "summary" dell'output.
+
+            Poi, basandoti ESCLUSIVAMENTE sul contenuto di quel riassunto, compila il campo "questions" come segue.
+            """
+
+@functools.lru_cache(maxsize=8)
+def _summarizer_instructions(language: str) -> str:
+    """Get the (cached) summarizer instructions for a language.
+
+    Args:
+        language (str): The language the summary should be written in
+
+    Returns:
+        str: The summarizer instructions
+    """
+    return _SUMMARIZER_TEMPLATE.format(language=language)
+
+@functools.lru_cache(maxsize=8)
+def _quiz_generator_instructions(language: str) -> str:
+    """Get the (cached) quiz generator instructions for a language.
+
+    The number of questions to generate (and any chunk context) is passed
+    in the input message, so these instructions stay constant per language.
+
+    Args:
+        language (str): The language the quiz should be written in
+
+    Returns:
+        str: The quiz generator instructions
+    """
+    return _QUIZ_GENERATOR_TEMPLATE.format(language=language)
+
+@functools.lru_cache(maxsize=8)
+def _quiz_with_summary_instructions(language: str) -> str:
+    """Get the (cached) combined summarize-then-quiz instructions for a language.
+
+    One agent call produces both the summary (kept for saving to disk) and
+    the questions, halving the number of API round-trips per chunk.
+
+    Args:
+        language (str): The language the summary and quiz should be written in
+
+    Returns:
+        str: The combined instructions
+    """
+    return _summarizer_instructions(language) + _SUMMARY_TO_QUIZ_BRIDGE + _quiz_generator_instructions(language)
+
+@functools.lru_cache(maxsize=4)
+def _get_encoder(model: str):
+    """Get the (cached) tiktoken encoder for a model.
+
+    Args:
+        model (str): The OpenAI model name
+
+    Returns:
+        tiktoken.Encoding: The encoder for the model
+    """
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        # unknown model name: fall back to the current-generation encoding
+        return tiktoken.get_encoding("o200k_base")
+
+class QuizGenerator:
+    """Class for generating quizzes using AI agents"""
+    
+    def __init__(self, model: str, summary_dir: str, cache_path: Optional[str] = "semantic_cache.db", save_summaries: bool = True):
+        """Initialize the quiz generator
+
+        Args:
+            model (str): The OpenAI model to use
+            summary_dir (str): Directory to save summaries
+            cache_path (Optional[str]): SQLite file backing the semantic response cache (None disables caching)
+            save_summaries (bool): Whether to persist summaries to disk at all (they are not needed for quiz generation)
+        """
+        self.model = model
+        self.summary_dir = summary_dir
+        self.save_summaries = save_summaries
+        os.makedirs(self.summary_dir, exist_ok=True)
+
+        # summaries queued for writing; flushed in one pass by flush_summaries()
+        self._summary_buffer: List[Tuple[str, str]] = []
+
+        # shared request semaphore, created lazily so it binds to the running loop
+        self._request_semaphore: Optional[asyncio.Semaphore] = None
+
+        # agents reused across chunks, keyed by (language, question count);
+        # instance-level so the cache dies with the generator instead of
+        # pinning it (and its HTTP client) for the life of the process
+        self._agent_cache: Dict[Tuple[str, int], Agent] = {}
+
+        # one pooled HTTP/2 client shared by every agent call: connections are kept
+        # alive and concurrent requests multiplex over them instead of paying a
+        # TCP+TLS handshake each time
+        self._http_client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(60.0),
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32)
+        )
+        self._openai_client = AsyncOpenAI(http_client=self._http_client)
+        set_default_openai_client(self._openai_client)
+
+        # the cache reuses the pooled client for its embedding calls
+        self._response_cache = SemanticResponseCache(cache_path, client=self._openai_client) if cache_path else None
+
+    async def aclose(self) -> None:
+        """Close the shared HTTP client and the response cache. Await this on application shutdown."""
+        if self._response_cache:
+            self._response_cache.close()
+        await self._http_client.aclose()
+
+    def _get_quiz_with_summary_agent(self, language: str, num_questions: int) -> Agent:
+        """Get the (cached) combined summarize-then-quiz agent.
+
+        Args:
+            language (str): The language the summary and quiz should be written in
+            num_questions (int): Question count the output-token cap is sized for
+
+        Returns:
+            Agent: The combined agent
+        """
+        key = (language, num_questions)
+        agent = self._agent_cache.get(key)
+        if agent is None:
+            agent = Agent(
+                name="summ_then_quiz",
+                instructions=_quiz_with_summary_instructions(language),
+                output_type=QuizWithSummary,
+                model=self.model,
+                model_settings=ModelSettings(
+                    temperature=GENERATION_TEMPERATURE,
+                    max_tokens=SUMMARY_MAX_TOKENS + TOKENS_PER_QUESTION * num_questions
                 )
-                
+            )
+            self._agent_cache[key] = agent
+        return agent
+
+    def _get_request_semaphore(self) -> asyncio.Semaphore:
+        """Get the generator-wide semaphore bounding concurrent API calls.
+
+        One semaphore is shared across all documents and chunks so the
+        MAX_PARALLEL_REQUESTS cap holds even when create_quizzes fans out
+        over many documents at once.
+
+        Returns:
+            asyncio.Semaphore: The shared request semaphore
+        """
+        if self._request_semaphore is None:
+            self._request_semaphore = asyncio.Semaphore(MAX_PARALLEL_REQUESTS)
+        return self._request_semaphore
+
+    async def _run_with_retry(self, agent: Agent, input_text: str, semaphore: asyncio.Semaphore):
+        """Run an agent under the shared semaphore, retrying with exponential backoff on rate limits.
+
+        Args:
+            agent (Agent): The agent to run
+            input_text (str): The input to pass to the agent
+            semaphore (asyncio.Semaphore): Semaphore bounding concurrent API calls
+
+        Returns:
+            The result of Runner.run
+        """
+        async with semaphore:
+            for attempt, delay in enumerate([*RETRY_DELAYS, None]):
+                try:
+                    return await Runner.run(agent, input_text)
+                except RateLimitError:
+                    if delay is None:
+                        raise
+                    logging.warning(f"Rate limit hit for agent {agent.name} (attempt {attempt + 1}). Retrying in {delay}s...")
+                    await asyncio.sleep(delay)
+
+    async def _run_agent_cached(self, agent: Agent, input_text: str, semaphore: asyncio.Semaphore):
+        """Run an agent, consulting the semantic response cache before calling the API.
+
+        Args:
+            agent (Agent): The agent to run
+            input_text (str): The input to pass to the agent
+            semaphore (asyncio.Semaphore): Semaphore bounding concurrent API calls
+
+        Returns:
+            The agent's final output (the agent's output_type model, or a string)
+        """
+        output_type = agent.output_type
+        # the language lives only in the instructions, not in the input text, so the
+        # cache must be namespaced by them: the same document in another language is
+        # byte-identical input and must not hit
+        cache_namespace = f"{agent.name}:{hashlib.sha256(str(agent.instructions).encode('utf-8')).hexdigest()[:16]}"
+        if self._response_cache:
+            cached = await self._response_cache.get(cache_namespace, input_text)
+            if cached is not None:
+                return output_type.model_validate_json(cached) if output_type else cached
+
+        result = await self._run_with_retry(agent, input_text, semaphore)
+        output = result.final_output_as(output_type) if output_type else result.final_output
+
+        if self._response_cache and output:
+            serialized = output.model_dump_json() if isinstance(output, BaseModel) else output
+            await self._response_cache.put(cache_namespace, input_text, serialized)
+        return output
+
+    def _split_text_into_chunks(self, text: str, chunk_size: int = MAX_CHUNK_TOKENS, token_ids: Optional[List[int]] = None) -> List[str]:
+        """Splits text into token-accurate chunks, preferring paragraph boundaries.
+
+        Args:
+            text (str): The text to split
+            chunk_size (int): Maximum tokens per chunk
+            token_ids (Optional[List[int]]): The text already encoded, if the
+                caller has it; avoids encoding the document a second time
+
+        Returns:
+            List[str]: The decoded text chunks
+        """
+        encoder = _get_encoder(self.model)
+        if token_ids is None:
+            token_ids = encoder.encode(text)
+        num_tokens = len(token_ids)
+
+        chunks = []
+        start = 0
+        while start < num_tokens:
+            end = min(start + chunk_size, num_tokens)
+            if end < num_tokens:
+                # round the split point back to the nearest paragraph break so
+                # sentences are not cut mid-way
+                scan_start = max(start + 1, end - PARAGRAPH_SCAN_TOKENS)
+                tail_text = encoder.decode(token_ids[scan_start:end])
+                break_pos = tail_text.rfind("\n\n")
+                if break_pos > 0:
+                    end = scan_start + len(encoder.encode(tail_text[:break_pos]))
+            chunks.append(encoder.decode(token_ids[start:end]))
+            if end >= num_tokens:
+                break
+            # overlap the next chunk with the end of this one to preserve context
+            start = max(start + 1, end - CHUNK_OVERLAP_TOKENS)
+
+        logging.info(f"Split text of {num_tokens} tokens into {len(chunks)} chunks.")
+        return chunks
+
+    def _save_summary(self, base_filename: str, summary_text: str) -> None:
+        """Queue a document's summary for writing.
+
+        Writes are buffered and performed in one pass by flush_summaries(),
+        keeping per-file open/close overhead off the generation path. Does
+        nothing when save_summaries is disabled.
+
+        Args:
+            base_filename (str): The document's base filename (no extension)
+            summary_text (str): The summary text to save
+        """
+        if not self.save_summaries:
+            return
+        summary_path = os.path.join(self.summary_dir, f"{base_filename}_summary.txt")
+        self._summary_buffer.append((summary_path, summary_text))
+
+    def flush_summaries(self) -> None:
+        """Write all buffered summaries to disk and clear the buffer."""
+        if not self._summary_buffer:
+            return
+        for summary_path, summary_text in self._summary_buffer:
+            save_text_to_file(summary_text, summary_path)
+            logging.info(f"Summary saved to: {summary_path}")
+        logging.info(f"Flushed {len(self._summary_buffer)} buffered summaries.")
+        self._summary_buffer.clear()
+
+    async def _single_pass(self, text: str, base_filename: str, language: str, num_questions_total: int) -> Tuple[Optional[Quiz], Optional[str]]:
+        """Generate a quiz from a text that fits in a single chunk.
+
+        Skips the chunking, per-chunk question accounting, and chunk context
+        note entirely for the common small-document case.
+
+        Args:
+            text (str): The text to process
+            base_filename (str): The document's base filename (no extension)
+            language (str): The language to generate the quiz in
+            num_questions_total (int): Total number of questions desired
+
+        Returns:
+            Tuple[Optional[Quiz], Optional[str]]: The quiz and the base filename
+        """
+        agent = self._get_quiz_with_summary_agent(language, num_questions_total)
+        semaphore = self._get_request_semaphore()
+        doc_input = f"Genera esattamente {num_questions_total} domande a scelta multipla.\n\n{text}"
+
+        result = await self._run_agent_cached(agent, doc_input, semaphore)
+        if not result:
+            logging.error(f"No output for {base_filename} in single-pass generation.")
+            return None, base_filename
+
+        if result.summary:
+            self._save_summary(base_filename, result.summary)
+
+        if not result.questions:
+            logging.error(f"No questions generated for {base_filename}.")
+            return None, base_filename
+
+        quiz = Quiz(questions=result.questions[:num_questions_total] if num_questions_total > 0 else result.questions)
+        logging.info(f"Generated a quiz with {len(quiz.questions)} questions for {base_filename} in a single pass.")
+        return quiz, base_filename
+
+    async def iter_questions(self, text: str, filename: str, language: str, num_questions_total: int = 10, token_ids: Optional[List[int]] = None) -> AsyncIterator[Question]:
+        """Yield questions as soon as each chunk's generation completes.
+
+        Callers (UI, streaming Excel writer) see the first questions while
+        slower chunks are still in flight, instead of waiting for the whole
+        document. Chunk summaries are aggregated and saved once all chunks
+        have finished.
+
+        Args:
+            text (str): The text to process
+            filename (str): The name of the file to process
+            language (str): The language to generate the quiz in
+            num_questions_total (int): Total number of questions desired (default: 10)
+            token_ids (Optional[List[int]]): The text already encoded, if the
+                caller has it; avoids encoding the document a second time
+
+        Yields:
+            Question: Each generated question, in chunk completion order
+        """
+        base_filename = os.path.splitext(filename)[0]
+
+        text_chunks = self._split_text_into_chunks(text, token_ids=token_ids)
+        num_chunks = len(text_chunks)
+
+        if num_chunks == 0:
+            logging.warning(f"No text chunks to process for {filename}.")
+            return
+
+        semaphore = self._get_request_semaphore()
+
+        async def process_chunk(i: int, chunk: str) -> Tuple[int, Optional[QuizWithSummary]]:
+            questions_to_attempt_for_this_chunk = num_questions_total // num_chunks + (1 if i < num_questions_total % num_chunks else 0)
+            logging.info(f"Attempting to generate {questions_to_attempt_for_this_chunk} questions for chunk {i + 1}/{num_chunks} of {filename}.")
+
+            agent = self._get_quiz_with_summary_agent(language, questions_to_attempt_for_this_chunk)
+
+            chunk_note = ""
+            if num_chunks > 1:
+                chunk_note = f"Nota: questo è il frammento {i + 1} di {num_chunks} di un documento più grande. Concentrati su questo specifico frammento.\n"
+            chunk_input = (
+                f"Genera esattamente {questions_to_attempt_for_this_chunk} domande a scelta multipla.\n"
+                f"{chunk_note}\n"
+                f"{chunk}"
+            )
+            return i, await self._run_agent_cached(agent, chunk_input, semaphore)
+
+        # split the question budget evenly across chunks up-front, then run the
+        # combined summarize-then-quiz agent once per chunk, all chunks concurrently
+        chunk_tasks = [asyncio.ensure_future(process_chunk(i, chunk)) for i, chunk in enumerate(text_chunks)]
+
+        summaries_by_chunk: Dict[int, str] = {}
+        try:
+            for completed in asyncio.as_completed(chunk_tasks):
                 try:
-                    chunk_quiz_result = await Runner.run(quiz_generator_agent_for_chunk, chunk_summary)
-                    if chunk_quiz_result.final_output:
-                        chunk_quiz = chunk_quiz_result.final_output_as(Quiz)
-                        if chunk_quiz and chunk_quiz.questions:
-                            all_questions.extend(chunk_quiz.questions)
-                            logging.info(f"Generated {len(chunk_quiz.questions)} questions from chunk {i + 1}. Total questions so far: {len(all_questions)}.")
-                    else:
-                        logging.warning(f"No output from quiz generator for chunk {i + 1}/{num_chunks} of {filename}.")
+                    i, chunk_result = await completed
                 except Exception as e:
-                    logging.error(f"Error generating quiz for chunk {i + 1}/{num_chunks} of {filename}: {str(e)}")
-                    logging.error(traceback.format_exc())
-            
-            # save the aggregated summaries
-            if aggregated_chunk_summaries_for_saving:
-                full_aggregated_summary_text = "\n\n".join(aggregated_chunk_summaries_for_saving)
-                summary_filename = f"{base_filename}_summary.txt"
-                summary_path = os.path.join(self.summary_dir, summary_filename)
-                save_text_to_file(full_aggregated_summary_text, summary_path)
-                logging.info(f"Aggregated summary of chunks saved to: {summary_path}")
+                    logging.error(f"Error processing a chunk of {filename}: {str(e)}")
+                    continue
+                if not chunk_result:
+                    logging.warning(f"No output for chunk {i + 1}/{num_chunks} of {filename}.")
+                    continue
+                if chunk_result.summary:
+                    summaries_by_chunk[i] = chunk_result.summary
+                for question in chunk_result.questions or []:
+                    yield question
+        finally:
+            # save the aggregated summaries in chunk order
+            if summaries_by_chunk:
+                self._save_summary(base_filename, "\n\n".join(summaries_by_chunk[i] for i in sorted(summaries_by_chunk)))
+
+    async def create_quiz_from_text(self, text: str, filename: str, language: str, num_questions_total: int = 10) -> Tuple[Optional[Quiz], Optional[str]]:
+        """Process a single text document, generate questions per chunk, and aggregate them.
+
+        Args:
+            text (str): The text to process
+            filename (str): The name of the file to process
+            language (str): The language to generate the quiz in
+            num_questions_total (int): Total number of questions desired for the quiz (default: 10)
+
+        Returns:
+            Tuple[Optional[Quiz], Optional[str]]: A tuple containing the final quiz and the base filename
+        """
+        try:
+            base_filename = os.path.splitext(filename)[0]
+
+            # encode once: the same token ids decide the single-pass shortcut
+            # and feed the chunk splitter
+            token_ids = _get_encoder(self.model).encode(text)
+
+            # small documents fit in one chunk: skip the chunk bookkeeping entirely
+            if len(token_ids) <= MAX_CHUNK_TOKENS:
+                return await self._single_pass(text, base_filename, language, num_questions_total)
+
+            all_questions: List[Question] = [
+                question async for question in self.iter_questions(text, filename, language, num_questions_total, token_ids=token_ids)
+            ]
 
             if not all_questions:
                 logging.error(f"No questions generated for {filename} after processing all chunks.")
@@ -205,6 +512,178 @@ class QuizGenerator:
             logging.error(traceback.format_exc())
             return None, None
 
+    async def create_quizzes(self, docs: List[dict]) -> List[Tuple[Optional[Quiz], Optional[str]]]:
+        """Process several documents concurrently with a bounded task group.
+
+        While one document awaits its agent calls, the others' calls are
+        already in flight; a semaphore keeps the number of documents being
+        worked on under OpenAI rate limits. Combines with the per-chunk
+        fan-out inside create_quiz_from_text for two-level parallelism.
+
+        Args:
+            docs (List[dict]): Keyword arguments for create_quiz_from_text per
+                document (text, filename, language, num_questions_total)
+
+        Returns:
+            List[Tuple[Optional[Quiz], Optional[str]]]: One (quiz, base_filename)
+                tuple per document, in input order
+        """
+        semaphore = asyncio.Semaphore(MAX_PARALLEL_DOCUMENTS)
+
+        async def process_one(doc: dict) -> Tuple[Optional[Quiz], Optional[str]]:
+            async with semaphore:
+                return await self.create_quiz_from_text(**doc)
+
+        results = await asyncio.gather(*(process_one(doc) for doc in docs), return_exceptions=True)
+
+        quizzes: List[Tuple[Optional[Quiz], Optional[str]]] = []
+        for doc, result in zip(docs, results):
+            if isinstance(result, Exception):
+                logging.error(f"Error processing {doc.get('filename')}: {str(result)}")
+                quizzes.append((None, None))
+            else:
+                quizzes.append(result)
+        return quizzes
+
+    async def _run_batch(self, client: AsyncOpenAI, request_lines: List[dict]) -> Dict[str, str]:
+        """Submit a list of chat completion requests as a Batch API job and wait for the results.
+
+        Args:
+            client (AsyncOpenAI): The OpenAI client to use
+            request_lines (List[dict]): One Batch API request dict per line of the input JSONL
+
+        Returns:
+            Dict[str, str]: Mapping of custom_id to the completion text of each successful request
+        """
+        outputs: Dict[str, str] = {}
+        if not request_lines:
+            return outputs
+
+        jsonl_payload = b"\n".join(orjson.dumps(line) for line in request_lines)
+        batch_input_file = await client.files.create(
+            file=("batch_requests.jsonl", jsonl_payload),
+            purpose="batch"
+        )
+        batch = await client.batches.create(
+            input_file_id=batch_input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        logging.info(f"Submitted batch {batch.id} with {len(request_lines)} requests.")
+
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            await asyncio.sleep(BATCH_POLL_INTERVAL)
+            batch = await client.batches.retrieve(batch.id)
+            logging.info(f"Batch {batch.id} status: {batch.status}")
+
+        if batch.status != "completed":
+            logging.error(f"Batch {batch.id} finished with status {batch.status}.")
+            return outputs
+
+        output_file = await client.files.content(batch.output_file_id)
+        for line in output_file.text.splitlines():
+            if not line.strip():
+                continue
+            entry = orjson.loads(line)
+            response = entry.get("response") or {}
+            if response.get("status_code") != 200:
+                logging.error(f"Batch request {entry.get('custom_id')} failed with status {response.get('status_code')}.")
+                continue
+            outputs[entry["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+        return outputs
+
+    async def create_quizzes_batch(self, docs: List[Tuple[str, str, str, int]]) -> List[Tuple[Optional[Quiz], str]]:
+        """Process many documents offline through the OpenAI Batch API (half the cost of online calls).
+
+        Intended for bulk, non-interactive jobs where results within 24h are acceptable.
+        All summarizer prompts are submitted as one batch; a second batch then generates
+        a quiz from each returned summary. The interactive per-file path in
+        create_quiz_from_text is unaffected.
+
+        Args:
+            docs (List[Tuple[str, str, str, int]]): (text, filename, language, num_questions) per document
+
+        Returns:
+            List[Tuple[Optional[Quiz], str]]: One (quiz, base_filename) tuple per input document
+        """
+        client = self._openai_client
+        doc_infos = []
+        summary_requests = []
+        # custom_ids are keyed by input index: the Batch API rejects duplicate
+        # custom_ids, and two docs can share a stem (a.pdf and a.txt)
+        for idx, (text, filename, language, num_questions) in enumerate(docs):
+            base_filename = os.path.splitext(filename)[0]
+            doc_infos.append((idx, base_filename, language, num_questions))
+            summary_requests.append({
+                "custom_id": f"{idx}:{base_filename}:summary",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self.model,
+                    "temperature": GENERATION_TEMPERATURE,
+                    "max_tokens": SUMMARY_MAX_TOKENS,
+                    "messages": [
+                        {"role": "system", "content": _summarizer_instructions(language)},
+                        {"role": "user", "content": text},
+                    ],
+                },
+            })
+
+        summaries = await self._run_batch(client, summary_requests)
+
+        quiz_requests = []
+        for idx, base_filename, language, num_questions in doc_infos:
+            summary = summaries.get(f"{idx}:{base_filename}:summary")
+            if not summary:
+                logging.warning(f"No summary returned for {base_filename}. Skipping quiz generation.")
+                continue
+
+            # save the summary like the interactive path does
+            self._save_summary(base_filename, summary)
+
+            quiz_requests.append({
+                "custom_id": f"{idx}:{base_filename}:quiz",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self.model,
+                    "temperature": GENERATION_TEMPERATURE,
+                    "max_tokens": TOKENS_PER_QUESTION * num_questions,
+                    "messages": [
+                        {"role": "system", "content": _quiz_generator_instructions(language)},
+                        {"role": "user", "content": f"Genera esattamente {num_questions} domande a scelta multipla.\n\n{summary}"},
+                    ],
+                    "response_format": {
+                        "type": "json_schema",
+                        "json_schema": {
+                            "name": "quiz",
+                            "schema": Quiz.model_json_schema(),
+                        },
+                    },
+                },
+            })
+
+        quiz_outputs = await self._run_batch(client, quiz_requests)
+
+        results: List[Tuple[Optional[Quiz], str]] = []
+        for idx, base_filename, language, num_questions in doc_infos:
+            quiz_json = quiz_outputs.get(f"{idx}:{base_filename}:quiz")
+            if not quiz_json:
+                logging.error(f"No quiz returned for {base_filename}.")
+                results.append((None, base_filename))
+                continue
+            try:
+                quiz = Quiz.model_validate_json(quiz_json)
+                results.append((quiz, base_filename))
+                logging.info(f"Parsed quiz with {len(quiz.questions)} questions for {base_filename} from batch output.")
+            except Exception as e:
+                logging.error(f"Error parsing batch quiz output for {base_filename}: {str(e)}")
+                logging.error(traceback.format_exc())
+                results.append((None, base_filename))
+
+        self.flush_summaries()
+        return results
+
 # test QuizGenerator
 # if __name__ == '__main__':
 #     async def test_quiz_generator():
@@ -2,10 +2,17 @@ import os
 import logging
 import traceback
 import io
-import pandas as pd
-from typing import List, Tuple
+import openpyxl
+from openpyxl.utils import get_column_letter
+from typing import Iterable, Iterator, List, Tuple
 from models import Quiz
 
+# cap on Excel column width
+MAX_COLUMN_WIDTH = 50
+
+# fixed output schema: one question per row, 4 answer/score column pairs
+QUIZ_COLUMNS = ['DOMANDA'] + [name for i in range(1, 5) for name in (f'OPZIONE {i}', f'PUNTEGGIO {i}')]
+
 class QuizExcelConverter:
     """Class for converting quiz JSON files to Excel format"""
     
@@ -17,7 +24,46 @@ class QuizExcelConverter:
         """
         self.excel_output_dir = os.path.join(base_dir, "excel_question_answers")
         os.makedirs(self.excel_output_dir, exist_ok=True)
-    
+
+    def _rows(self, quizzes: Iterable[Quiz]) -> Iterator[list]:
+        """Yield one row per question across the given quizzes
+
+        Args:
+            quizzes (Iterable[Quiz]): the quizzes to flatten into rows
+
+        Yields:
+            list: a 9-element row matching QUIZ_COLUMNS
+        """
+        for quiz in quizzes:
+            for question in quiz.questions:
+                yield [
+                    question.question_text,
+                    *(value for answer in question.answers for value in (answer.text, answer.score))
+                ]
+
+    def _write_workbook(self, rows_iter: Iterator[list], sink, sheet_name: str = 'Quiz') -> None:
+        """Stream rows straight to an Excel workbook
+
+        Uses an openpyxl write-only workbook, which keeps only the current row
+        in memory while serializing.
+
+        Args:
+            rows_iter (Iterator[list]): rows to write, matching QUIZ_COLUMNS
+            sink: the destination accepted by Workbook.save (a path or a buffer)
+            sheet_name (str): name of the sheet to create
+        """
+        workbook = openpyxl.Workbook(write_only=True)
+        worksheet = workbook.create_sheet(sheet_name)
+
+        # column widths must be declared before rows are appended in write-only mode
+        for i in range(1, len(QUIZ_COLUMNS) + 1):
+            worksheet.column_dimensions[get_column_letter(i)].width = MAX_COLUMN_WIDTH
+
+        worksheet.append(QUIZ_COLUMNS)
+        for row in rows_iter:
+            worksheet.append(row)
+        workbook.save(sink)
+
     def json_to_excel(self, quiz: Quiz, filename: str) -> str:
         """Convert a quiz object to Excel format using the simple format
         
@@ -30,35 +76,11 @@ class QuizExcelConverter:
         """
         try:
             excel_path = os.path.join(self.excel_output_dir, f"{filename}_quiz.xlsx")
-            
-            # DataFrame to store the quiz in simplified format
-            data = []
-            
-            # Add each question with its answers in a single row
-            for question in quiz.questions:
-                row = {'DOMANDA': question.question_text}
-                
-                # Add each answer option and score
-                for i, answer in enumerate(question.answers, 1):
-                    row[f'OPZIONE {i}'] = answer.text
-                    row[f'PUNTEGGIO {i}'] = answer.score
-                
-                data.append(row)
-            
-            # Create DataFrame
-            df = pd.DataFrame(data)
-            
-            # Write to Excel
-            with pd.ExcelWriter(excel_path, engine='openpyxl') as writer:
-                df.to_excel(writer, index=False, sheet_name='Quiz')
-                
-                # Set column widths
-                workbook = writer.book
-                worksheet = workbook.active
-                for i, col in enumerate(df.columns):
-                    column_width = max(df[col].astype(str).map(len).max(), len(col)) + 2
-                    worksheet.column_dimensions[chr(65 + i)].width = min(column_width, 50)  # Limit width to 50
-            
+
+            # write to a tempfile and rename atomically so readers never see a partial .xlsx
+            tmp_path = excel_path + ".tmp"
+            self._write_workbook(self._rows([quiz]), tmp_path)
+            os.replace(tmp_path, excel_path)
             return excel_path
             
         except Exception as e:
@@ -77,35 +99,7 @@ class QuizExcelConverter:
         """
         try:
             buffer = io.BytesIO()
-            
-            # DataFrame to store the quiz in simplified format
-            data = []
-            
-            # Add each question with its answers in a single row
-            for question in quiz.questions:
-                row = {'DOMANDA': question.question_text}
-                
-                # Add each answer option and score
-                for i, answer in enumerate(question.answers, 1):
-                    row[f'OPZIONE {i}'] = answer.text
-                    row[f'PUNTEGGIO {i}'] = answer.score
-                
-                data.append(row)
-            
-            # Create DataFrame
-            df = pd.DataFrame(data)
-            
-            # Write to Excel
-            with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-                df.to_excel(writer, index=False, sheet_name='Quiz')
-                
-                # Set column widths
-                workbook = writer.book
-                worksheet = workbook.active
-                for i, col in enumerate(df.columns):
-                    column_width = max(df[col].astype(str).map(len).max(), len(col)) + 2
-                    worksheet.column_dimensions[chr(65 + i)].width = min(column_width, 50)  # Limit width to 50
-            
+            self._write_workbook(self._rows([quiz]), buffer)
             buffer.seek(0)
             return buffer
             
@@ -125,37 +119,7 @@ class QuizExcelConverter:
         """
         try:
             buffer = io.BytesIO()
-            
-            # DataFrame to store all quizzes in simplified format
-            all_data = []
-            
-            # Process each quiz
-            for quiz, filename in quizzes:
-                # Add each question with its answers in a single row
-                for question in quiz.questions:
-                    row = {'DOMANDA': question.question_text}
-                    
-                    # Add each answer option and score
-                    for i, answer in enumerate(question.answers, 1):
-                        row[f'OPZIONE {i}'] = answer.text
-                        row[f'PUNTEGGIO {i}'] = answer.score
-                    
-                    all_data.append(row)
-            
-            # Create DataFrame
-            df = pd.DataFrame(all_data)
-            
-            # Write to Excel buffer
-            with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-                df.to_excel(writer, index=False, sheet_name='Combined Quiz')
-                
-                # Set column widths
-                workbook = writer.book
-                worksheet = workbook.active
-                for i, col in enumerate(df.columns):
-                    column_width = max(df[col].astype(str).map(len).max(), len(col)) + 2
-                    worksheet.column_dimensions[chr(65 + i)].width = min(column_width, 50)  # Limit width to 50
-            
+            self._write_workbook(self._rows(quiz for quiz, _ in quizzes), buffer, sheet_name='Combined Quiz')
             buffer.seek(0)
             return buffer
             
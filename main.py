@@ -1,9 +1,9 @@
 import os
-import json
 import logging
 import traceback
 import asyncio
 import nest_asyncio
+import orjson
 import streamlit as st
 from dotenv import load_dotenv
 from excel_converter import QuizExcelConverter
@@ -129,7 +129,7 @@ def main():
                             continue
                         
                         # save raw text
-                        base_filename = pdf_file.name.replace('.pdf', '')
+                        base_filename = os.path.splitext(pdf_file.name)[0]
                         raw_text_path = os.path.join(RAW_TEXT_DIR, f"{base_filename}.txt")
                         save_text_to_file(pdf_text, raw_text_path)
                         
@@ -144,10 +144,11 @@ def main():
                             
                             # save quiz in json
                             output_path = os.path.join(JSON_OUTPUT_DIR, f"{base_filename}_quiz.json")
-                            with open(output_path, "w") as f:
-                                json.dump(quiz.model_dump(), f, indent=2, ensure_ascii=False)
+                            with open(output_path, "wb") as f:
+                                f.write(orjson.dumps(quiz.model_dump(), option=orjson.OPT_INDENT_2))
                             
-                            # notify about summary
+                            # write the buffered summary so the path shown below exists
+                            quiz_generator.flush_summaries()
                             st.info(f"Summary saved in: {os.path.join(SUMMARY_TEXT_DIR, f'{base_filename}_summary.txt')}")
                             
                             if not combine_excel:
@@ -212,10 +213,11 @@ def main():
                             
                             # save quiz in json
                             output_path = os.path.join(JSON_OUTPUT_DIR, f"{base_filename}_quiz.json")
-                            with open(output_path, "w") as f:
-                                json.dump(quiz.model_dump(), f, indent=2, ensure_ascii=False)
+                            with open(output_path, "wb") as f:
+                                f.write(orjson.dumps(quiz.model_dump(), option=orjson.OPT_INDENT_2))
                             
-                            # notify about summary
+                            # write the buffered summary so the path shown below exists
+                            quiz_generator.flush_summaries()
                             st.info(f"Summary saved in: {os.path.join(SUMMARY_TEXT_DIR, f'{base_filename}_summary.txt')}")
                             
                             if not combine_excel:
@@ -277,7 +279,9 @@ def main():
             logging.error(traceback.format_exc())
         
         finally:
-            # close event loop
+            # write buffered summaries, then close the shared HTTP client and the event loop
+            quiz_generator.flush_summaries()
+            loop.run_until_complete(quiz_generator.aclose())
             loop.close()
         
         st.success("all files have been processed!")
@@ -13,6 +13,13 @@ class Question(BaseModel):
         description="list of 4 possible answers",
     )
 
+class QuizWithSummary(BaseModel):
+    summary: str = Field(..., description="summary of the source text the questions are based on")
+    questions: List[Question] = Field(
+        ...,
+        description="list of quiz questions"
+    )
+
 class Quiz(BaseModel):
     questions: List[Question] = Field(
         ..., 
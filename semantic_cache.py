@@ -0,0 +1,182 @@
+import hashlib
+import logging
+import sqlite3
+import traceback
+from collections import OrderedDict
+from typing import Optional
+
+import faiss
+import numpy as np
+from openai import AsyncOpenAI
+
+# embedding model used to key the cache
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_DIMENSIONS = 1536
+
+# cosine similarity above which a cached response is considered a hit
+SIMILARITY_THRESHOLD = 0.92
+
+# number of exact-match entries kept in memory to skip the embedding call
+EXACT_MATCH_LRU_SIZE = 256
+
+# embeddings held between a get() miss and its put(); bounded because a failed
+# agent call never issues the put that would remove the entry
+PENDING_EMBEDDINGS_MAX = 256
+
+class SemanticResponseCache:
+    """Semantic cache for agent responses.
+
+    Near-duplicate documents (common with medical PDFs sharing boilerplate
+    sections) produce near-identical agent inputs. This cache keys responses
+    on an embedding of (agent name, input text): exact repeats hit an
+    in-memory SHA-256 LRU without embedding at all, while cosine-similar
+    inputs above SIMILARITY_THRESHOLD return the cached output from a FAISS
+    index with a SQLite sidecar for persistence.
+    """
+
+    def __init__(self, cache_path: str, similarity_threshold: float = SIMILARITY_THRESHOLD, client: Optional[AsyncOpenAI] = None):
+        """Initialize the cache
+
+        Args:
+            cache_path (str): Path of the SQLite file backing the cache
+            similarity_threshold (float): Minimum cosine similarity for a semantic hit
+            client (Optional[AsyncOpenAI]): OpenAI client for embedding calls; pass the
+                caller's pooled client to avoid opening a second connection pool
+        """
+        self.similarity_threshold = similarity_threshold
+        self._db = sqlite3.connect(cache_path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "vector_id INTEGER PRIMARY KEY, "
+            "prompt_hash TEXT UNIQUE, "
+            "embedding BLOB, "
+            "output TEXT)"
+        )
+        self._db.commit()
+        # ids are explicit (the SQLite vector_id), never the FAISS insertion
+        # position: another process sharing the db file may insert rows this
+        # instance has not mirrored, so positions cannot stand in for ids
+        self._index = faiss.IndexIDMap(faiss.IndexFlatIP(EMBEDDING_DIMENSIONS))
+        self._exact_lru: "OrderedDict[str, str]" = OrderedDict()
+        self._pending_embeddings: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._client = client or AsyncOpenAI()
+        self._load_index()
+
+    def close(self) -> None:
+        """Close the SQLite connection. Call when the cache is no longer needed."""
+        self._db.close()
+
+    def _load_index(self) -> None:
+        """Rebuild the FAISS index from the embeddings persisted in SQLite."""
+        rows = self._db.execute("SELECT vector_id, embedding FROM responses ORDER BY vector_id").fetchall()
+        if rows:
+            vectors = np.vstack([np.frombuffer(blob, dtype=np.float32) for _, blob in rows])
+            ids = np.array([vector_id for vector_id, _ in rows], dtype=np.int64)
+            self._index.add_with_ids(vectors, ids)
+            logging.info(f"Loaded {len(rows)} cached responses into the semantic cache index.")
+
+    @staticmethod
+    def _hash(key: str) -> str:
+        """Hash a cache key with SHA-256."""
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    async def _embed(self, text: str) -> Optional[np.ndarray]:
+        """Embed a text with the cache's embedding model, normalized for cosine search."""
+        try:
+            response = await self._client.embeddings.create(model=EMBEDDING_MODEL, input=text[:8000])
+            vector = np.asarray(response.data[0].embedding, dtype=np.float32)
+            vector /= np.linalg.norm(vector)
+            return vector
+        except Exception as e:
+            logging.error(f"Error embedding text for semantic cache: {str(e)}")
+            logging.error(traceback.format_exc())
+            return None
+
+    def _remember_exact(self, prompt_hash: str, output: str) -> None:
+        """Insert an entry into the exact-match LRU, evicting the oldest if full."""
+        self._exact_lru[prompt_hash] = output
+        self._exact_lru.move_to_end(prompt_hash)
+        if len(self._exact_lru) > EXACT_MATCH_LRU_SIZE:
+            self._exact_lru.popitem(last=False)
+
+    async def get(self, agent_name: str, input_text: str) -> Optional[str]:
+        """Look up a cached response for an agent input.
+
+        Args:
+            agent_name (str): Name of the agent the input is for
+            input_text (str): The input that would be passed to the agent
+
+        Returns:
+            Optional[str]: The cached output JSON/text, or None on a miss
+        """
+        key = f"{agent_name}\n{input_text}"
+        prompt_hash = self._hash(key)
+
+        # exact-match fast path: no embedding call needed
+        if prompt_hash in self._exact_lru:
+            self._exact_lru.move_to_end(prompt_hash)
+            logging.info(f"Semantic cache exact hit for agent {agent_name}.")
+            return self._exact_lru[prompt_hash]
+
+        row = self._db.execute("SELECT output FROM responses WHERE prompt_hash = ?", (prompt_hash,)).fetchone()
+        if row:
+            self._remember_exact(prompt_hash, row[0])
+            logging.info(f"Semantic cache exact hit for agent {agent_name}.")
+            return row[0]
+
+        vector = await self._embed(key)
+        if vector is None:
+            return None
+        # keep the embedding around so a following put() does not re-embed;
+        # evict the oldest entries, since failed agent calls never put()
+        self._pending_embeddings[prompt_hash] = vector
+        if len(self._pending_embeddings) > PENDING_EMBEDDINGS_MAX:
+            self._pending_embeddings.popitem(last=False)
+
+        if self._index.ntotal == 0:
+            return None
+
+        scores, ids = self._index.search(vector.reshape(1, -1), 1)
+        # the returned id is the SQLite vector_id; re-check the stored row so a
+        # stale index entry can never serve another prompt's output
+        if ids[0][0] != -1 and scores[0][0] >= self.similarity_threshold:
+            row = self._db.execute("SELECT output FROM responses WHERE vector_id = ?", (int(ids[0][0]),)).fetchone()
+            if row:
+                logging.info(f"Semantic cache similarity hit for agent {agent_name} (cosine={scores[0][0]:.3f}).")
+                self._remember_exact(prompt_hash, row[0])
+                return row[0]
+        return None
+
+    async def put(self, agent_name: str, input_text: str, output: str) -> None:
+        """Store an agent response in the cache.
+
+        Args:
+            agent_name (str): Name of the agent that produced the output
+            input_text (str): The input the agent was run with
+            output (str): The output to cache (JSON for structured outputs)
+        """
+        key = f"{agent_name}\n{input_text}"
+        prompt_hash = self._hash(key)
+
+        vector = self._pending_embeddings.pop(prompt_hash, None)
+        if vector is None:
+            vector = await self._embed(key)
+        if vector is None:
+            return
+
+        try:
+            # let SQLite assign the id, then mirror only rows that actually landed
+            # (a concurrent miss on the same prompt may have stored this response);
+            # the index carries the id explicitly, so it stays valid even when other
+            # processes sharing the db file insert rows this instance never sees
+            cursor = self._db.execute(
+                "INSERT OR IGNORE INTO responses (prompt_hash, embedding, output) VALUES (?, ?, ?)",
+                (prompt_hash, vector.tobytes(), output)
+            )
+            self._db.commit()
+            if cursor.rowcount > 0:
+                self._index.add_with_ids(vector.reshape(1, -1), np.array([cursor.lastrowid], dtype=np.int64))
+            self._remember_exact(prompt_hash, output)
+        except Exception as e:
+            logging.error(f"Error storing response in semantic cache: {str(e)}")
+            logging.error(traceback.format_exc())